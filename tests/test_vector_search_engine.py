@@ -0,0 +1,239 @@
+import copy
+import heapq
+import importlib.util
+import pickle
+import random
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+# The script's file name is not a valid module name, so load it by path;
+# registering it lets pickle find its functions and classes by name
+_SPEC = importlib.util.spec_from_file_location(
+    "vector_space_indexing_engine",
+    Path(__file__).resolve().parent.parent / "vector-space-indexing-engine.py",
+)
+engine_module = importlib.util.module_from_spec(_SPEC)
+sys.modules[_SPEC.name] = engine_module
+_SPEC.loader.exec_module(engine_module)
+VectorSearchEngine = engine_module.VectorSearchEngine
+
+
+def zipf_corpus(num_docs, vocab_size=2000, seed=7):
+    """
+    Build a corpus whose term frequencies follow a Zipf-like distribution.
+    """
+    rng = random.Random(seed)
+    words = [f"t{i}" for i in range(vocab_size)]
+    weights = [1.0 / (i + 1) for i in range(vocab_size)]
+    return {
+        doc_id: " ".join(rng.choices(words, weights, k=rng.randint(5, 80)))
+        for doc_id in range(num_docs)
+    }
+
+
+class ReAddDocumentTest(unittest.TestCase):
+    def test_re_adds_keep_one_row_per_document(self):
+        engine = VectorSearchEngine()
+        docs = zipf_corpus(50)
+        engine.add_documents(docs)
+
+        rng = random.Random(1)
+        for round_number in range(2000):
+            doc_id = rng.randrange(50)
+            engine.add_document(doc_id, docs[(doc_id + round_number) % 50])
+            self.assertLessEqual(len(engine._doc_ids), 2 * len(engine.documents))
+            if round_number % 500 == 0:
+                engine.search("t1 t2")
+                self.assertEqual(len(engine._doc_ids), len(engine.documents))
+
+        engine.search("t1 t2")
+        self.assertEqual(len(engine._doc_ids), len(engine.documents))
+        self.assertEqual(len(engine.indptr) - 1, len(engine.documents))
+        self.assertEqual(len(engine.doc_lengths), len(engine.documents))
+
+    def test_re_added_document_matches_fresh_index(self):
+        docs = zipf_corpus(200)
+        replaced = dict(docs)
+        replaced[3] = "t1 t5 t5 unusual"
+
+        engine = VectorSearchEngine()
+        engine.add_documents(docs)
+        engine.add_document(3, replaced[3])
+
+        fresh = VectorSearchEngine()
+        fresh.add_documents(replaced)
+
+        self.assertEqual(engine.get_document_stats(), fresh.get_document_stats())
+        for query in ["t1 t5", "unusual", "t0 t3 t3"]:
+            self.assertEqual(
+                sorted(engine.search(query, 10**6)),
+                sorted(fresh.search(query, 10**6)),
+            )
+
+
+class ParallelTokenizationTest(unittest.TestCase):
+    def test_worker_processes_build_the_same_index(self):
+        docs = zipf_corpus(500)
+        docs["mixed"] = "Hello, World! hello... WORLD?"
+
+        serial = VectorSearchEngine()
+        serial.add_documents(docs)
+        parallel = VectorSearchEngine()
+        parallel.add_documents(docs, processes=2)
+
+        self.assertEqual(parallel.get_document_stats(), serial.get_document_stats())
+        self.assertEqual(parallel.vocab, serial.vocab)
+        self.assertEqual(parallel.term_counts, serial.term_counts)
+        for query in ["t0", "t1 t7 t7", "hello world"]:
+            self.assertEqual(parallel.search(query, 10**6), serial.search(query, 10**6))
+
+
+class CopyAndPickleTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = VectorSearchEngine()
+        self.engine.add_documents(zipf_corpus(200))
+        # Fill the query cache so the copies carry one along
+        self.query_results = {query: self.engine.search(query) for query in ["t0", "t1 t7"]}
+
+    def check_independent_copy(self, clone):
+        for query, results in self.query_results.items():
+            self.assertEqual(clone.search(query), results)
+
+        clone.add_document("veg", "zucchini t1")
+        self.assertEqual([doc_id for _, doc_id, _ in clone.search("zucchini")], ["veg"])
+        self.assertEqual(self.engine.search("zucchini"), [])
+        self.assertNotIn("veg", self.engine.documents)
+
+    def test_deepcopy(self):
+        self.check_independent_copy(copy.deepcopy(self.engine))
+
+    def test_pickle_round_trip(self):
+        self.check_independent_copy(pickle.loads(pickle.dumps(self.engine)))
+
+
+class IdfTableTest(unittest.TestCase):
+    def test_table_matches_calculate_tf_idf(self):
+        engine = VectorSearchEngine()
+        engine.add_documents(zipf_corpus(300))
+        engine.add_document("extra", "t1 t2 t2 rare")
+
+        doc_id = "extra"
+        row = engine._rows[doc_id]
+        start, end = engine.indptr[row], engine.indptr[row + 1]
+        expected = {
+            term_id: engine.calculate_tf_idf(
+                freq, engine.doc_lengths[row], engine.document_frequencies[term_id]
+            )
+            for term_id, freq in zip(engine.col_ids[start:end], engine.term_counts[start:end])
+        }
+
+        self.assertEqual(engine.create_tfidf_vector(doc_id), engine.normalize_vector(expected))
+
+
+class PostingWeightPrecisionTest(unittest.TestCase):
+    def test_scores_and_top_k_stay_close_to_exact_cosine(self):
+        engine = VectorSearchEngine()
+        docs = zipf_corpus(1000)
+        engine.add_documents(docs)
+        k = 10
+
+        rng = random.Random(11)
+        queries = ["t1 t0 t0 t0", "t0", "t3 t250"] + [
+            " ".join(f"t{int(rng.paretovariate(1)) - 1}" for _ in range(rng.randint(1, 4)))
+            for _ in range(37)
+        ]
+        for query in queries:
+            results = engine.search(query, k)
+            query_vector = dict(engine._query_vector(query))
+            exact = {
+                doc_id: engine.cosine_similarity(engine.create_tfidf_vector(doc_id), query_vector)
+                for doc_id in docs
+            }
+
+            # Single-precision weights are off by at most 2**-24 relative,
+            # and no weight of a unit-length vector exceeds 1
+            bound = 2 ** -23 * sum(query_vector.values())
+            for score, doc_id, _ in results:
+                self.assertLess(abs(score - exact[doc_id]), bound)
+
+            # Only documents within twice the bound of the k-th best can swap places
+            kth_best = sorted(exact.values(), reverse=True)[k - 1]
+            returned = {doc_id for _, doc_id, _ in results}
+            for doc_id, score in exact.items():
+                if score > kth_best + 2 * bound:
+                    self.assertIn(doc_id, returned)
+                if doc_id in returned:
+                    self.assertGreater(score, kth_best - 2 * bound)
+
+
+class TopKSearchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        docs = zipf_corpus(3000)
+        # Identical documents score exactly the same, so tie order shows up
+        for doc_id in range(0, 3000, 7):
+            docs[doc_id] = docs[0]
+        cls.engine = VectorSearchEngine()
+        cls.engine.add_documents(docs)
+
+        rng = random.Random(5)
+        cls.queries = [
+            "t0", "t1 t0 t0 t0", "t0 t1 t2 t3 t4", "t0 t1999", "t1 t1500 t1800", "unknown",
+        ] + [
+            " ".join(f"t{int(rng.paretovariate(0.7)) - 1}" for _ in range(rng.randint(1, 5)))
+            for _ in range(60)
+        ]
+
+    def test_top_k_is_prefix_of_full_ranking(self):
+        engine = self.engine
+        engine.search("t0")
+        longest = max(len(postings) for postings in engine.postings)
+        self.assertGreater(longest, 10 * VectorSearchEngine._BLOCK_SIZE)
+
+        wand = mock.patch.object(
+            engine_module, "_block_max_wand", wraps=engine_module._block_max_wand
+        )
+        with wand as wand_calls:
+            for query in self.queries:
+                full = engine.search(query, 10**9)
+                for k in (1, 3, 10, 64, 65, 200):
+                    with self.subTest(query=query, k=k):
+                        self.assertEqual(engine.search(query, k), full[:k])
+        self.assertTrue(wand_calls.called)
+
+    def test_block_max_wand_matches_exhaustive_scores(self):
+        # Covers the queries search itself routes to the exhaustive path too
+        engine = self.engine
+        engine.search("t0")
+        for query in self.queries:
+            query_vector = engine._query_vector(query)
+            scores = engine_module._accumulate_scores(
+                query_vector, engine.postings, len(engine._doc_ids)
+            )
+            exhaustive = [(score, row) for row, score in enumerate(scores) if score]
+            for k in (1, 10, 65):
+                cursors = [
+                    engine_module._PostingCursor(engine.postings[term_id], weight, term_index)
+                    for term_index, (term_id, weight) in enumerate(query_vector)
+                    if engine.postings[term_id]
+                ]
+                with self.subTest(query=query, k=k):
+                    self.assertEqual(
+                        heapq.nlargest(k, engine_module._block_max_wand(cursors, k),
+                                       key=lambda x: x[0]),
+                        heapq.nlargest(k, exhaustive, key=lambda x: x[0]),
+                    )
+
+    def test_non_positive_max_results_slice_full_ranking(self):
+        for query in self.queries[:10]:
+            full = self.engine.search(query, 10**9)
+            self.assertEqual(self.engine.search(query, 0), [])
+            for k in (-1, -5):
+                self.assertEqual(self.engine.search(query, k), full[:k])
+
+
+if __name__ == "__main__":
+    unittest.main()
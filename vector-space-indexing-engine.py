@@ -1,10 +1,335 @@
 import math
-import re
-from collections import defaultdict, Counter
-from typing import Dict, List, Tuple, Union
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from itertools import accumulate, compress, repeat
+from multiprocessing import Pool
+from operator import attrgetter, mul
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import string
 
 
+# Maps every punctuation character to a space
+_PUNCT_TABLE = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
+
+
+def _tokenize(text: str) -> List[str]:
+    """
+    Lowercase text, blank out punctuation and split it into words.
+    
+    Lives at module level so worker processes can run it.
+    
+    Args:
+        text: Raw text string
+        
+    Returns:
+        List of cleaned tokens
+    """
+    # split() already drops the empty strings between repeated separators
+    return text.lower().translate(_PUNCT_TABLE).split()
+
+
+def _count_terms(text: str) -> Dict[str, int]:
+    """
+    Tokenize text and count each term, all inside a worker process.
+    
+    Args:
+        text: Raw text string
+        
+    Returns:
+        Dictionary mapping words to their frequencies
+    """
+    return Counter(_tokenize(text))
+
+
+def _l2_norm(values: Iterable[float]) -> float:
+    """
+    Calculate the L2 length of a sequence of vector components.
+    
+    Args:
+        values: Vector components
+        
+    Returns:
+        Square root of the sum of squared components
+    """
+    return math.sqrt(sum(value ** 2 for value in values))
+
+
+def _l2_normalize(values: List[float]) -> List[float]:
+    """
+    Scale a sequence of vector components to unit L2 length.
+    
+    Shared by document and query vectors, so both normalize identically.
+    
+    Args:
+        values: Vector components
+        
+    Returns:
+        Unit-length components (a plain copy if the length is 0)
+    """
+    magnitude = _l2_norm(values)
+    if magnitude == 0:
+        return list(values)
+    
+    return [value / magnitude for value in values]
+
+
+class _PostingList:
+    """
+    Compressed posting list of one term, sorted by row.
+    
+    Rows are stored as gaps from the previous row, packed into the
+    narrowest unsigned array type that fits the largest gap, and weights
+    are stored as single-precision floats. Postings are grouped into
+    fixed-size blocks that each record their last row and largest weight,
+    so any block can be decoded on its own and skipped without being
+    decoded.
+    """
+    
+    __slots__ = ('block_size', 'gaps', 'weights', 'last_rows', 'max_weights')
+    
+    def __init__(self, rows: List[int], weights: List[float], block_size: int):
+        gaps = [row - previous for previous, row in zip([0] + rows, rows)]
+        max_gap = max(gaps, default=0)
+        typecode = next(code for code in 'BHIQ' if max_gap < 1 << (8 * array(code).itemsize))
+        
+        self.block_size = block_size
+        self.gaps = array(typecode, gaps)
+        self.weights = array('f', weights)
+        self.last_rows = rows[block_size - 1::block_size]
+        if len(rows) % block_size:
+            self.last_rows.append(rows[-1])
+        # Maxima of the stored weights, so they bound them exactly
+        self.max_weights = array('f', [
+            max(self.weights[start:start + block_size])
+            for start in range(0, len(rows), block_size)
+        ])
+    
+    def __len__(self) -> int:
+        return len(self.weights)
+    
+    def decode_block(self, block: int) -> List[int]:
+        """
+        Rebuild the rows of one block from its gaps.
+        
+        Args:
+            block: Block index
+            
+        Returns:
+            Rows of the block's postings, in increasing order
+        """
+        start = block * self.block_size
+        base = self.last_rows[block - 1] if block else 0
+        rows = list(accumulate(self.gaps[start:start + self.block_size], initial=base))
+        del rows[0]
+        return rows
+
+
+def _accumulate_scores(query_vector: Tuple[Tuple[int, float], ...],
+                       postings: List[_PostingList],
+                       num_rows: int) -> List[float]:
+    """
+    Multiply the document-term matrix by a query vector.
+    
+    Args:
+        query_vector: (term_id, weight) pairs of the query
+        postings: Posting lists of (row, weight) pairs, indexed by term id
+        num_rows: Number of document rows in the matrix
+        
+    Returns:
+        Dense list of dot products indexed by document row
+    """
+    scores = [0.0] * num_rows
+    for term_id, query_weight in query_vector:
+        term_postings = postings[term_id]
+        # Gaps run on across block boundaries, so one running sum rebuilds
+        # every row; the weights are multiplied in C by map() and only the
+        # scatter into scores is left to the loop
+        rows = accumulate(term_postings.gaps)
+        contributions = map(mul, repeat(query_weight), term_postings.weights)
+        for row, contribution in zip(rows, contributions):
+            scores[row] += contribution
+    
+    return scores
+
+
+class _PostingCursor:
+    """
+    Forward-only cursor over one query term's posting list.
+    
+    Uses the per-block last rows and largest weights of the posting list
+    to bound the term's contribution to a row without decoding postings,
+    and decodes at most one block at a time.
+    """
+    
+    __slots__ = ('postings', 'term_index', 'query_weight', 'block_size', 'num_blocks',
+                 'max_score', 'pos', 'block', 'decoded_block', 'decoded_rows', 'row', 'weight')
+    
+    def __init__(self, postings: _PostingList, query_weight: float, term_index: int):
+        self.postings = postings
+        self.term_index = term_index
+        self.query_weight = query_weight
+        self.block_size = postings.block_size
+        self.num_blocks = len(postings.last_rows)
+        self.max_score = self.query_weight * max(postings.max_weights)
+        self.pos = 0
+        self.block = 0
+        self.decoded_block = 0
+        self.decoded_rows = postings.decode_block(0)
+        self.row = self.decoded_rows[0]
+        self.weight = postings.weights[0]
+    
+    def _find_block(self, target: int) -> int:
+        """
+        Find the first block at or after the current posting that may hold target.
+        
+        Args:
+            target: Row to look for
+            
+        Returns:
+            Index of the first remaining block whose last row is at least
+            target, or num_blocks if there is none
+        """
+        # Block last rows are sorted, so binary search the remaining ones
+        return bisect_left(self.postings.last_rows, target, self.pos // self.block_size)
+    
+    def next_geq(self, target: int) -> None:
+        """
+        Move to the first posting whose row is at least target.
+        
+        Sets row to math.inf once the posting list is exhausted.
+        
+        Args:
+            target: Row to move to
+        """
+        block = self._find_block(target)
+        if block == self.num_blocks:
+            self.pos = len(self.postings)
+            self.row = math.inf
+            return
+        
+        if block != self.decoded_block:
+            self.decoded_rows = self.postings.decode_block(block)
+            self.decoded_block = block
+        
+        # The block's last row is >= target, so this lands inside the block
+        start = block * self.block_size
+        rows = self.decoded_rows
+        offset = bisect_left(rows, target, max(self.pos - start, 0))
+        
+        self.pos = start + offset
+        self.row = rows[offset]
+        self.weight = self.postings.weights[self.pos]
+    
+    def block_max_score(self, target: int) -> float:
+        """
+        Bound this term's score contribution to target without moving the cursor.
+        
+        Also remembers the block holding target for block_last_row.
+        
+        Args:
+            target: Row whose score is being bounded
+            
+        Returns:
+            Query weight times the largest weight of the block that may hold
+            target, or 0 if no remaining block can
+        """
+        self.block = self._find_block(target)
+        if self.block == self.num_blocks:
+            return 0.0
+        return self.query_weight * self.postings.max_weights[self.block]
+    
+    def block_last_row(self) -> float:
+        """
+        Last row of the block found by the latest block_max_score call.
+        
+        Returns:
+            Last row of that block, or math.inf if there was none
+        """
+        if self.block == self.num_blocks:
+            return math.inf
+        return self.postings.last_rows[self.block]
+
+
+def _block_max_wand(cursors: List[_PostingCursor], k: int) -> Iterator[Tuple[float, int]]:
+    """
+    Find the top-k rows for a query with Block-Max WAND.
+    
+    Rows are visited in increasing order. A row is only scored once the
+    per-term upper bounds, first over whole lists and then over the blocks
+    around it, show it could beat the k-th best score found so far; runs
+    of rows that cannot are skipped block by block.
+    
+    Args:
+        cursors: One cursor per query term with a non-empty posting list,
+            numbered by the term's position in the query vector
+        k: Number of top rows wanted
+        
+    Yields:
+        (score, row) for each row that enters the running top-k, in row order
+    """
+    top_scores = []
+    threshold = 0.0
+    
+    while cursors:
+        # Cursors on the same row stay in query term order, so a row's
+        # contributions are added up in the same order as _accumulate_scores
+        # adds them and both give bit-identical scores
+        cursors.sort(key=attrgetter('row', 'term_index'))
+        
+        # The pivot is the first cursor at which the summed list maxima
+        # exceed the threshold; no earlier row can make it into the top k
+        upper_bound = 0.0
+        for pivot, cursor in enumerate(cursors):
+            upper_bound += cursor.max_score
+            if upper_bound > threshold:
+                break
+        else:
+            return
+        
+        pivot_row = cursors[pivot].row
+        while pivot + 1 < len(cursors) and cursors[pivot + 1].row == pivot_row:
+            pivot += 1
+        leading = cursors[:pivot + 1]
+        
+        if sum(cursor.block_max_score(pivot_row) for cursor in leading) > threshold:
+            if cursors[0].row == pivot_row:
+                score = 0.0
+                for cursor in leading:
+                    score += cursor.query_weight * cursor.weight
+                
+                if len(top_scores) < k:
+                    heapq.heappush(top_scores, score)
+                    yield score, pivot_row
+                elif score > top_scores[0]:
+                    heapq.heapreplace(top_scores, score)
+                    yield score, pivot_row
+                
+                if len(top_scores) == k:
+                    threshold = top_scores[0]
+                
+                for cursor in leading:
+                    cursor.next_geq(pivot_row + 1)
+            else:
+                for cursor in leading:
+                    if cursor.row < pivot_row:
+                        cursor.next_geq(pivot_row)
+        else:
+            # Nothing up to the end of the shortest current block can win
+            next_row = min(cursor.block_last_row() for cursor in leading) + 1
+            if pivot + 1 < len(cursors):
+                next_row = min(next_row, cursors[pivot + 1].row)
+            next_row = max(next_row, pivot_row + 1)
+            
+            for cursor in leading:
+                cursor.next_geq(next_row)
+        
+        # Only the leading cursors moved, so only they can have run out
+        if any(cursor.row == math.inf for cursor in leading):
+            cursors = [cursor for cursor in cursors if cursor.row != math.inf]
+
+
 class VectorSearchEngine:
     """
     A simple vector space search engine implementation.
@@ -12,11 +337,40 @@ class VectorSearchEngine:
     Uses TF-IDF weighting and cosine similarity for document ranking.
     """
     
+    # Number of distinct query strings whose vectors are kept between searches
+    _QUERY_CACHE_SIZE = 2048
+    
+    # Postings per block of the Block-Max WAND upper-bound index
+    _BLOCK_SIZE = 64
+    
+    # Block-Max WAND only beats scoring every posting when few results are
+    # wanted and a long posting list can be skipped past a much shorter one
+    _WAND_MAX_RESULTS = 10
+    _WAND_MIN_LENGTH_RATIO = 100
+    
     def __init__(self):
         self.documents = {}
-        self.index = {}
-        self.document_frequencies = defaultdict(int)
+        self.vocab = {}
+        self.inv_vocab = []
+        self.document_frequencies = []
+        self.idf = []
         self.total_documents = 0
+        self.postings = []
+        
+        # Forward index in CSR layout: the terms of row r are
+        # col_ids[indptr[r]:indptr[r + 1]], with matching term_counts
+        self.indptr = array('Q', [0])
+        self.col_ids = array('I')
+        self.term_counts = array('I')
+        self.doc_lengths = array('Q')
+        self._doc_ids = []
+        self._rows = {}
+        self._dirty = False
+        self._idf_dirty = False
+        
+        # Query vectors by query string, least recently used first; a plain
+        # attribute, so engines still copy and pickle along with their cache
+        self._query_cache = OrderedDict()
         
     def preprocess_text(self, text: str) -> List[str]:
         """
@@ -31,16 +385,7 @@ class VectorSearchEngine:
         if not isinstance(text, str):
             raise ValueError("Input must be a string")
         
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove punctuation and split into words
-        text = re.sub(f'[{re.escape(string.punctuation)}]', ' ', text)
-        
-        # Split and filter out empty strings
-        tokens = [word.strip() for word in text.split() if word.strip()]
-        
-        return tokens
+        return _tokenize(text)
     
     def create_concordance(self, text: str) -> Dict[str, int]:
         """
@@ -71,11 +416,22 @@ class VectorSearchEngine:
             return 0.0
         
         tf = term_freq / doc_length if doc_length > 0 else 0
-        idf = math.log(self.total_documents / doc_freq) if doc_freq > 0 else 0
         
-        return tf * idf
+        return tf * self.calculate_idf(doc_freq)
     
-    def vector_magnitude(self, vector: Dict[str, float]) -> float:
+    def calculate_idf(self, doc_freq: int) -> float:
+        """
+        Calculate the inverse document frequency of a term.
+        
+        Args:
+            doc_freq: Number of documents containing the term
+            
+        Returns:
+            IDF score (0 for terms found in no document)
+        """
+        return math.log(self.total_documents / doc_freq) if doc_freq > 0 else 0.0
+    
+    def vector_magnitude(self, vector: Dict[int, float]) -> float:
         """
         Calculate the magnitude of a vector.
         
@@ -88,11 +444,29 @@ class VectorSearchEngine:
         if not isinstance(vector, dict):
             raise ValueError("Vector must be a dictionary")
         
-        return math.sqrt(sum(value ** 2 for value in vector.values()))
+        return _l2_norm(vector.values())
+    
+    def normalize_vector(self, vector: Dict[int, float]) -> Dict[int, float]:
+        """
+        Scale a vector to unit length.
+        
+        Args:
+            vector: Dictionary representing a vector
+            
+        Returns:
+            Unit-length copy of the vector (unchanged if its magnitude is 0)
+        """
+        if not isinstance(vector, dict):
+            raise ValueError("Vector must be a dictionary")
+        
+        return dict(zip(vector, _l2_normalize(list(vector.values()))))
     
-    def cosine_similarity(self, vec1: Dict[str, float], vec2: Dict[str, float]) -> float:
+    def cosine_similarity(self, vec1: Dict[int, float], vec2: Dict[int, float]) -> float:
         """
-        Calculate cosine similarity between two vectors.
+        Calculate cosine similarity between two unit-length vectors.
+        
+        Both vectors must already be normalized (see normalize_vector), so
+        the cosine reduces to their dot product.
         
         Args:
             vec1: First vector
@@ -104,21 +478,10 @@ class VectorSearchEngine:
         if not isinstance(vec1, dict) or not isinstance(vec2, dict):
             raise ValueError("Both arguments must be dictionaries")
         
-        # Calculate dot product
-        dot_product = 0
-        for term in vec1:
-            if term in vec2:
-                dot_product += vec1[term] * vec2[term]
-        
-        # Calculate magnitudes
-        mag1 = self.vector_magnitude(vec1)
-        mag2 = self.vector_magnitude(vec2)
-        
-        # Avoid division by zero
-        if mag1 == 0 or mag2 == 0:
-            return 0.0
-        
-        return dot_product / (mag1 * mag2)
+        # Intersect the term ids, then multiply and sum the matching weights
+        # with map() so the whole dot product runs in C
+        common = vec1.keys() & vec2.keys()
+        return sum(map(mul, map(vec1.__getitem__, common), map(vec2.__getitem__, common)), 0.0)
     
     def add_document(self, doc_id: Union[int, str], text: str) -> None:
         """
@@ -131,38 +494,262 @@ class VectorSearchEngine:
         if not isinstance(text, str):
             raise ValueError("Document text must be a string")
         
+        self._store_document(doc_id, text, self.create_concordance(text))
+        
+        # Document frequencies changed, so every cached vector is stale
+        self._dirty = True
+        self._query_cache.clear()
+    
+    def add_documents(self, documents: Dict[Union[int, str], str],
+                      processes: Optional[int] = 1) -> None:
+        """
+        Add a batch of documents and build the index once for all of them.
+        
+        Args:
+            documents: Dictionary mapping document identifiers to their text
+            processes: Worker processes used to tokenize the batch; 1 keeps
+                tokenization in this process and None uses every CPU
+        
+        Workers receive the tokenizer by reference, so with processes other
+        than 1 this module must be importable under its __name__ in them; a
+        module loaded from its file path has to be registered in sys.modules
+        before it is executed.
+        """
+        if not all(isinstance(text, str) for text in documents.values()):
+            raise ValueError("Document text must be a string")
+        
+        if not documents:
+            return
+        
+        # Tokenize the whole batch, then fold it into the index in one pass
+        if processes == 1:
+            concordances = [self.create_concordance(text) for text in documents.values()]
+        else:
+            # Workers send back term counts rather than full token lists,
+            # which is less to pickle and leaves no counting to this process
+            with Pool(processes) as pool:
+                concordances = pool.map(_count_terms, documents.values(), chunksize=64)
+        for (doc_id, text), concordance in zip(documents.items(), concordances):
+            self._store_document(doc_id, text, concordance)
+        
+        self._build_index()
+        self._query_cache.clear()
+    
+    def _store_document(self, doc_id: Union[int, str], text: str, concordance: Dict[str, int]) -> None:
+        """
+        Record a document and its concordance without rebuilding the inverted index.
+        
+        Args:
+            doc_id: Unique identifier for the document
+            text: Document text content
+            concordance: Word frequency dictionary of the text
+        """
         # Store the original document
         self.documents[doc_id] = text
         
-        # Create concordance
-        concordance = self.create_concordance(text)
+        # A re-added document gets a new row; the old one is left unused
+        # until the next compaction
+        old_row = self._rows.pop(doc_id, None)
+        if old_row is not None:
+            for term_id in self.col_ids[self.indptr[old_row]:self.indptr[old_row + 1]]:
+                self.document_frequencies[term_id] -= 1
+            
+            # Bound the dead rows between index rebuilds to the live ones
+            if len(self._doc_ids) - len(self._rows) > len(self._rows):
+                self._compact_rows()
+        
+        # Append the concordance to the index as a row of term ids and counts
+        for word, freq in concordance.items():
+            term_id = self._intern_term(word)
+            self.col_ids.append(term_id)
+            self.term_counts.append(freq)
+            self.document_frequencies[term_id] += 1
+        self.indptr.append(len(self.col_ids))
+        
+        # Total term count (L1 length), summed once here for TF normalization
+        self.doc_lengths.append(sum(concordance.values()))
+        
+        self._rows[doc_id] = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self.total_documents = len(self.documents)
+        self._idf_dirty = True
+    
+    def _compact_rows(self) -> None:
+        """
+        Drop the rows of replaced documents from the forward index.
         
-        # Update document frequencies
-        for word in concordance:
-            self.document_frequencies[word] += 1
+        Live rows keep their relative order and are renumbered from 0, so
+        the inverted index must be rebuilt afterwards.
+        """
+        indptr = array('Q', [0])
+        col_ids = array('I')
+        term_counts = array('I')
+        doc_lengths = array('Q')
+        doc_ids = []
+        
+        for doc_id, row in self._rows.items():
+            start, end = self.indptr[row], self.indptr[row + 1]
+            col_ids.extend(self.col_ids[start:end])
+            term_counts.extend(self.term_counts[start:end])
+            indptr.append(len(col_ids))
+            doc_lengths.append(self.doc_lengths[row])
+            self._rows[doc_id] = len(doc_ids)
+            doc_ids.append(doc_id)
+        
+        self.indptr = indptr
+        self.col_ids = col_ids
+        self.term_counts = term_counts
+        self.doc_lengths = doc_lengths
+        self._doc_ids = doc_ids
+    
+    def _intern_term(self, term: str) -> int:
+        """
+        Look up the integer id of a term, assigning the next free id if new.
         
-        # Store concordance in index
-        self.index[doc_id] = concordance
-        self.total_documents = len(self.documents)
+        Args:
+            term: Token to intern
+            
+        Returns:
+            Term id, usable as an index into document_frequencies
+        """
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            term_id = len(self.inv_vocab)
+            self.vocab[term] = term_id
+            self.inv_vocab.append(term)
+            self.document_frequencies.append(0)
+        
+        return term_id
+    
+    def _build_index(self) -> None:
+        """
+        Rebuild the inverted index from unit-length TF-IDF vectors.
+        
+        Documents are numbered by row, and the posting list of each term id
+        holds the (row, weight) pairs of the documents containing it, in row
+        order. Together they form a sparse document-term matrix stored column
+        by column, so search only visits documents that share at least one
+        term with the query.
+        
+        Posting lists are then compressed into _PostingList blocks.
+        """
+        if len(self._doc_ids) > len(self._rows):
+            self._compact_rows()
+        
+        posting_rows = [[] for _ in self.inv_vocab]
+        posting_weights = [[] for _ in self.inv_vocab]
+        
+        # Live rows come in increasing order, so posting lists stay sorted
+        for row in self._rows.values():
+            term_ids, weights = self._row_vector(row)
+            for term_id, weight in zip(term_ids, weights):
+                if weight > 0:
+                    posting_rows[term_id].append(row)
+                    posting_weights[term_id].append(weight)
+        
+        self.postings = [
+            _PostingList(rows, weights, self._BLOCK_SIZE)
+            for rows, weights in zip(posting_rows, posting_weights)
+        ]
+        
+        self._dirty = False
+    
+    def create_tfidf_vector(self, doc_id: Union[int, str]) -> Dict[int, float]:
+        """
+        Build the unit-length TF-IDF weighted vector of an indexed document.
+        
+        Args:
+            doc_id: Identifier of the document
+            
+        Returns:
+            TF-IDF weighted vector keyed by term id, normalized to unit length
+        """
+        if doc_id not in self._rows:
+            raise ValueError(f"Unknown document id: {doc_id!r}")
+        
+        return dict(zip(*self._row_vector(self._rows[doc_id])))
+    
+    def _row_vector(self, row: int) -> Tuple[array, List[float]]:
+        """
+        Compute the unit-length TF-IDF weights of one row of the forward index.
+        
+        Args:
+            row: Row of the document
+            
+        Returns:
+            Tuple of (term ids, weights) in the row's stored term order
+        """
+        if self._idf_dirty:
+            self._build_idf_table()
+        
+        start, end = self.indptr[row], self.indptr[row + 1]
+        term_ids = self.col_ids[start:end]
+        counts = self.term_counts[start:end]
+        
+        idf = self.idf
+        doc_length = self.doc_lengths[row]
+        weights = [freq / doc_length * idf[term_id] for term_id, freq in zip(term_ids, counts)]
+        
+        return term_ids, _l2_normalize(weights)
     
-    def create_tfidf_vector(self, concordance: Dict[str, int]) -> Dict[str, float]:
+    def _build_idf_table(self) -> None:
+        """
+        Recompute the IDF of every term id after the document set changed.
+        
+        Each IDF depends only on its term, so computing the logarithms once
+        here spares one math.log call per (document, term) pair.
         """
-        Convert a concordance to a TF-IDF weighted vector.
+        self.idf = [self.calculate_idf(doc_freq) for doc_freq in self.document_frequencies]
+        self._idf_dirty = False
+    
+    def _query_vector(self, query: str) -> Tuple[Tuple[int, float], ...]:
+        """
+        Look up the query vector of a query string, building it on a miss.
+        
+        Keeps the vectors of the last _QUERY_CACHE_SIZE distinct queries.
         
         Args:
-            concordance: Word frequency dictionary
+            query: Search query string
             
         Returns:
-            TF-IDF weighted vector
+            Tuple of (term_id, weight) pairs, empty if no query term is indexed
+        """
+        cache = self._query_cache
+        query_vector = cache.get(query)
+        if query_vector is None:
+            query_vector = cache[query] = self._build_query_vector(query)
+            if len(cache) > self._QUERY_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(query)
+        
+        return query_vector
+    
+    def _build_query_vector(self, query: str) -> Tuple[Tuple[int, float], ...]:
         """
-        doc_length = sum(concordance.values())
-        tfidf_vector = {}
+        Build the unit-length query vector for a query string.
         
-        for term, freq in concordance.items():
-            doc_freq = self.document_frequencies.get(term, 0)
-            tfidf_vector[term] = self.calculate_tf_idf(freq, doc_length, doc_freq)
+        Queries are weighted by simple term frequency (no IDF), and terms
+        missing from the index are dropped. The result is returned as a
+        tuple of (term_id, weight) pairs so it can be memoized.
         
-        return tfidf_vector
+        Args:
+            query: Search query string
+            
+        Returns:
+            Tuple of (term_id, weight) pairs, empty if no query term is indexed
+        """
+        tokens = self.preprocess_text(query)
+        query_vector = {}
+        
+        # The L1 length of the query is simply its token count
+        total_query_terms = len(tokens)
+        for term, freq in Counter(tokens).items():
+            term_id = self.vocab.get(term)
+            if term_id is not None:
+                query_vector[term_id] = freq / total_query_terms
+        
+        return tuple(self.normalize_vector(query_vector).items())
     
     def search(self, query: str, max_results: int = 10) -> List[Tuple[float, Union[int, str], str]]:
         """
@@ -170,7 +757,8 @@ class VectorSearchEngine:
         
         Args:
             query: Search query string
-            max_results: Maximum number of results to return
+            max_results: Maximum number of results to return; a negative
+                value returns all matches but that many of the lowest-ranked
             
         Returns:
             List of tuples (score, doc_id, preview_text)
@@ -181,37 +769,58 @@ class VectorSearchEngine:
         if not self.documents:
             return []
         
-        # Create query vector
-        query_concordance = self.create_concordance(query)
-        query_vector = {}
+        if max_results == 0:
+            return []
+        
+        if max_results < 0:
+            # As when slicing the full ranking, a negative limit drops that
+            # many of the lowest-ranked matches
+            return self.search(query, len(self.documents))[:max_results]
         
-        # Use simple term frequency for query (no IDF)
-        total_query_terms = sum(query_concordance.values())
-        for term, freq in query_concordance.items():
-            if term in self.document_frequencies:
-                query_vector[term] = freq / total_query_terms
+        # Repeated queries reuse their vector until the index changes
+        query_vector = self._query_vector(query)
+        if not query_vector:
+            return []
         
-        # Score all documents
+        if self._dirty:
+            self._build_index()
+        
+        # All stored vectors are unit length, so each dot product is the
+        # cosine similarity of query and document
+        lengths = [len(self.postings[term_id]) for term_id, _ in query_vector]
+        lengths = [length for length in lengths if length]
+        if (len(lengths) < 2 or max_results > self._WAND_MAX_RESULTS
+                or max(lengths) < self._WAND_MIN_LENGTH_RATIO * min(lengths)):
+            # Score every matching document in one pass over the posting lists
+            scores = _accumulate_scores(query_vector, self.postings, len(self._doc_ids))
+            candidates = [(scores[row], row) for row in compress(range(len(scores)), scores)]
+        else:
+            # Only documents that enter the running top max_results are
+            # scored into results; the pruned ones could never be returned
+            cursors = [
+                _PostingCursor(self.postings[term_id], query_weight, term_index)
+                for term_index, (term_id, query_weight) in enumerate(query_vector)
+                if self.postings[term_id]
+            ]
+            candidates = _block_max_wand(cursors, max_results)
+        
+        # Select the best max_results by similarity score (descending) without
+        # sorting every candidate; ties keep document order as a stable sort would
+        top = heapq.nlargest(max_results, candidates, key=lambda x: x[0])
+        
+        # Only the returned documents need a preview
         results = []
-        for doc_id, concordance in self.index.items():
-            # Create TF-IDF vector for document
-            doc_vector = self.create_tfidf_vector(concordance)
+        for similarity, row in top:
+            doc_id = self._doc_ids[row]
             
-            # Calculate similarity
-            similarity = self.cosine_similarity(query_vector, doc_vector)
+            # Get preview text (first 100 characters)
+            preview = self.documents[doc_id][:100]
+            if len(self.documents[doc_id]) > 100:
+                preview += "..."
             
-            if similarity > 0:
-                # Get preview text (first 100 characters)
-                preview = self.documents[doc_id][:100]
-                if len(self.documents[doc_id]) > 100:
-                    preview += "..."
-                
-                results.append((similarity, doc_id, preview))
-        
-        # Sort by similarity score (descending)
-        results.sort(reverse=True, key=lambda x: x[0])
+            results.append((similarity, doc_id, preview))
         
-        return results[:max_results]
+        return results
     
     def get_document_stats(self) -> Dict[str, Union[int, float]]:
         """
@@ -223,12 +832,16 @@ class VectorSearchEngine:
         if not self.documents:
             return {"total_documents": 0, "unique_terms": 0, "avg_doc_length": 0}
         
-        total_terms = sum(len(self.create_concordance(doc)) for doc in self.documents.values())
+        indptr = self.indptr
+        total_terms = sum(indptr[row + 1] - indptr[row] for row in self._rows.values())
         avg_length = total_terms / len(self.documents)
         
+        # Terms only found in replaced documents are no longer counted
+        unique_terms = len(self.document_frequencies) - self.document_frequencies.count(0)
+        
         return {
             "total_documents": self.total_documents,
-            "unique_terms": len(self.document_frequencies),
+            "unique_terms": unique_terms,
             "avg_doc_length": round(avg_length, 2)
         }
 
@@ -259,8 +872,7 @@ def main():
     
     # Add documents to the search engine
     print("Building search index...")
-    for doc_id, text in sample_docs.items():
-        engine.add_document(doc_id, text)
+    engine.add_documents(sample_docs)
     
     # Display statistics
     stats = engine.get_document_stats()